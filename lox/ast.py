@@ -1,9 +1,11 @@
 from abc import ABC
 from dataclasses import dataclass
+from functools import lru_cache
+from operator import add, eq, ge, gt, le, lt, mul, ne, sub, truediv
 from typing import Callable
 
 from .ctx import Ctx
-from .runtime import LoxFunction, LoxReturn
+from .runtime import LoxFunction, LoxReturn, show
 
 # Declaramos nossa classe base num módulo separado para esconder um pouco de
 # Python relativamente avançado de quem não se interessar pelo assunto.
@@ -11,6 +13,12 @@ from .runtime import LoxFunction, LoxReturn
 # A classe Node implementa um método `pretty` que imprime as árvores de forma
 # legível. Também possui funcionalidades para navegar na árvore usando cursores
 # e métodos de visitação.
+#
+# Os nós são dataclasses comuns, sem `slots=True`: Node não define __slots__,
+# então cada instância manteria um __dict__ de qualquer forma, e no Python 3.13
+# o acesso a atributos ficou mais lento com slots. Além disso, a execução usa
+# as closures produzidas por Node.compile(), que não consultam os atributos
+# dos nós.
 from .node import Node
 
 
@@ -21,6 +29,9 @@ from .node import Node
 # Tipos de valores que podem aparecer durante a execução do programa
 Value = bool | str | float | None
 
+# Função produzida por Node.compile(): recebe o contexto e retorna um valor
+Compiled = Callable[[Ctx], Value]
+
 
 class Expr(Node, ABC):
     """
@@ -52,8 +63,20 @@ class Program(Node):
     stmts: list[Stmt]
 
     def eval(self, ctx: Ctx):
-        for stmt in self.stmts:
-            stmt.eval(ctx)
+        self.compile()(ctx)
+
+    def _compile(self) -> Compiled:
+        steps = [(stmt.compile(), may_return(stmt)) for stmt in self.stmts]
+
+        def program(ctx: Ctx):
+            for stmt, returns in steps:
+                signal = stmt(ctx)
+                # Um return fora de funções interrompe o programa com o mesmo
+                # erro produzido por Return.eval
+                if returns and signal is not None:
+                    raise LoxReturn(signal[0])
+
+        return program
 
 
 #
@@ -76,6 +99,18 @@ class BinOp(Expr):
         right_value = self.right.eval(ctx)
         return self.op(left_value, right_value)
 
+    def _compile(self) -> Compiled:
+        op = self.op
+        if isinstance(self.left, Var) and isinstance(self.right, Literal):
+            fused = var_op_literal(self.left, op, self.right.value)
+            if fused is not None:
+                return fused
+
+        left = self.left.compile()
+        right = self.right.compile()
+        expr = infix(op, "left(ctx)", "right(ctx)")
+        return inline(f"return {expr}", left=left, right=right, op=op)
+
 
 @dataclass
 class Var(Expr):
@@ -87,11 +122,31 @@ class Var(Expr):
 
     name: str
 
+    # Distância até o escopo onde a variável foi declarada, calculada pelo
+    # Resolver. None indica que a variável deve ser buscada dinamicamente.
+    _depth = None
+
     def eval(self, ctx: Ctx):
-        try:
-            return ctx[self.name]
-        except KeyError:
-            raise NameError(f"variável {self.name} não existe!")
+        if self._depth is not None:
+            return ctx.get_at(self._depth, self.name)
+        return ctx.lookup(self.name)
+
+    def _compile(self) -> Compiled:
+        name = self.name
+
+        match self._depth:
+            case None:
+                var = lambda ctx: ctx.lookup(name)  # noqa: E731
+            case 0:
+                var = lambda ctx: ctx.scope[name]  # noqa: E731
+            case 1:
+                var = lambda ctx: ctx.parent.scope[name]  # noqa: E731
+            case 2:
+                var = lambda ctx: ctx.parent.parent.scope[name]  # noqa: E731
+            case depth:
+                var = lambda ctx: ctx.get_at(depth, name)  # noqa: E731
+
+        return var
 
 
 @dataclass
@@ -108,9 +163,10 @@ class Literal(Expr):
     def eval(self, ctx: Ctx):
         return self.value
 
+    def _compile(self) -> Compiled:
+        value = self.value
+        return lambda ctx: value
 
-def is_truthy(value):
-    return not (value is False or value is None)
 
 @dataclass
 class And(Expr):
@@ -124,10 +180,23 @@ class And(Expr):
 
     def eval(self, ctx: Ctx):
         left_value = self.left.eval(ctx)
-        if not is_truthy(left_value):
+        # Somente false e nil são falsos em Lox
+        if left_value is False or left_value is None:
             return left_value
         return self.right.eval(ctx)
 
+    def _compile(self) -> Compiled:
+        left = self.left.compile()
+        right = self.right.compile()
+
+        def and_(ctx: Ctx):
+            left_value = left(ctx)
+            if left_value is False or left_value is None:
+                return left_value
+            return right(ctx)
+
+        return and_
+
 
 @dataclass
 class Or(Expr):
@@ -140,10 +209,22 @@ class Or(Expr):
 
     def eval(self, ctx: Ctx):
         left_value = self.left.eval(ctx)
-        if is_truthy(left_value):
+        if left_value is not False and left_value is not None:
             return left_value
         return self.right.eval(ctx)
 
+    def _compile(self) -> Compiled:
+        left = self.left.compile()
+        right = self.right.compile()
+
+        def or_(ctx: Ctx):
+            left_value = left(ctx)
+            if left_value is not False and left_value is not None:
+                return left_value
+            return right(ctx)
+
+        return or_
+
 @dataclass
 class UnaryOp(Expr):
     """
@@ -158,6 +239,21 @@ class UnaryOp(Expr):
         v = self.value.eval(ctx)
         return self.op(v)
 
+    def _compile(self) -> Compiled:
+        op = self.op
+        # O transformer preserva o nó em casos como -42, mas o valor pode
+        # ser calculado uma única vez.
+        if isinstance(self.value, Literal):
+            try:
+                result = op(self.value.value)
+            except Exception:
+                pass
+            else:
+                return lambda ctx: result
+
+        value = self.value.compile()
+        return lambda ctx: op(value(ctx))
+
 
 @dataclass
 class Call(Expr):
@@ -175,7 +271,64 @@ class Call(Expr):
         
         if callable(obj):
             return obj(*params)
-        raise TypeError(f"{self.name} não é uma função!")
+        raise TypeError(f"{obj} não é uma função!")
+
+    def _compile(self) -> Compiled:
+        callee = self.obj.compile()
+        args = [param.compile() for param in self.params]
+
+        # Versões especializadas para as aridades mais comuns evitam criar
+        # uma lista de argumentos a cada chamada.
+        match args:
+            case []:
+
+                def call(ctx: Ctx):
+                    obj = callee(ctx)
+                    if callable(obj):
+                        return obj()
+                    raise TypeError(f"{obj} não é uma função!")
+
+            case [arg0]:
+
+                def call(ctx: Ctx):
+                    obj = callee(ctx)
+                    value0 = arg0(ctx)
+                    if callable(obj):
+                        return obj(value0)
+                    raise TypeError(f"{obj} não é uma função!")
+
+            case [arg0, arg1]:
+
+                def call(ctx: Ctx):
+                    obj = callee(ctx)
+                    value0 = arg0(ctx)
+                    value1 = arg1(ctx)
+                    if callable(obj):
+                        return obj(value0, value1)
+                    raise TypeError(f"{obj} não é uma função!")
+
+            case [arg0, arg1, arg2]:
+
+                def call(ctx: Ctx):
+                    obj = callee(ctx)
+                    value0 = arg0(ctx)
+                    value1 = arg1(ctx)
+                    value2 = arg2(ctx)
+                    if callable(obj):
+                        return obj(value0, value1, value2)
+                    raise TypeError(f"{obj} não é uma função!")
+
+            case _:
+
+                def call(ctx: Ctx):
+                    obj = callee(ctx)
+                    params = [arg(ctx) for arg in args]
+
+                    if callable(obj):
+                        return obj(*params)
+                    raise TypeError(f"{obj} não é uma função!")
+
+        return call
 
 
 @dataclass
@@ -206,11 +359,52 @@ class Assign(Expr):
     name: str
     value: Expr
 
+    # Ver Var._depth
+    _depth = None
+
     def eval(self, ctx: Ctx):
         v = self.value.eval(ctx)
-        ctx[self.name] = v
+        if self._depth is not None:
+            ctx.set_at(self._depth, self.name, v)
+        else:
+            ctx[self.name] = v
         return v
 
+    def _compile(self) -> Compiled:
+        name = self.name
+        depth = self._depth
+
+        # x = x <op> literal
+        match self.value:
+            case BinOp(left=Var() as var, right=Literal() as literal, op=op):
+                if var.name == name and var._depth == depth:
+                    fused = update_var(var, op, literal.value)
+                    if fused is not None:
+                        return fused
+
+        value = self.value.compile()
+        if depth in SCOPE_ACCESS:
+            body = f"""\
+{SCOPE_ACCESS[depth]}[name] = result = value(ctx)
+return result"""
+            return inline(body, name=name, value=value)
+
+        if depth is None:
+
+            def assign(ctx: Ctx):
+                v = value(ctx)
+                ctx[name] = v
+                return v
+
+        else:
+
+            def assign(ctx: Ctx):
+                v = value(ctx)
+                ctx.set_at(depth, name, v)
+                return v
+
+        return assign
+
 
 @dataclass
 class Getattr(Expr):
@@ -225,7 +419,12 @@ class Getattr(Expr):
     def eval(self, ctx):
         obj = self.value.eval(ctx)
         return getattr(obj, self.attr)
-        
+
+    def _compile(self) -> Compiled:
+        value = self.value.compile()
+        attr = self.attr
+        return lambda ctx: getattr(value(ctx), attr)
+
 
 @dataclass
 class Setattr(Expr):
@@ -244,6 +443,119 @@ class Setattr(Expr):
         setattr(obj, self.attr, v)
         return v
 
+    def _compile(self) -> Compiled:
+        target = self.obj.compile()
+        attr = self.attr
+        value = self.value.compile()
+
+        def setattr_(ctx: Ctx):
+            obj = target(ctx)
+            v = value(ctx)
+            setattr(obj, attr, v)
+            return v
+
+        return setattr_
+
+
+def may_return(node: Node) -> bool:
+    """
+    Verifica se a execução do comando pode terminar em um return.
+
+    Comandos return dentro de funções aninhadas não são considerados.
+    """
+    if isinstance(node, Return):
+        return True
+    if isinstance(node, Function):
+        return False
+    return any(may_return(child) for child in node.children())
+
+
+#
+# SUPERINSTRUÇÕES
+#
+# Combinações frequentes de nós (ex.: `i < 10` e `i = i + 1` em laços) são
+# compiladas para uma única closure que acessa o escopo diretamente, sem
+# chamar as closures dos filhos. Só se aplicam a variáveis resolvidas nos
+# escopos mais próximos; nos demais casos retornam None e o nó é compilado
+# normalmente.
+#
+# As closures são geradas a partir de código fonte para que os operadores
+# aritméticos e de comparação sejam escritos diretamente (ex.: `a + b`), o
+# que é mais rápido que chamar `operator.add(a, b)`.
+#
+
+# Operadores que podem ser escritos em forma infixa no código gerado
+INFIX_OPERATORS = {
+    add: "+",
+    sub: "-",
+    mul: "*",
+    truediv: "/",
+    lt: "<",
+    gt: ">",
+    le: "<=",
+    ge: ">=",
+    eq: "==",
+    ne: "!=",
+}
+
+# Acesso aos escopos mais próximos a partir do contexto atual
+SCOPE_ACCESS = {
+    0: "ctx.scope",
+    1: "ctx.parent.scope",
+    2: "ctx.parent.parent.scope",
+}
+
+
+def infix(op: Callable, left: str, right: str) -> str:
+    """
+    Código fonte que aplica a operação binária `op` aos operandos dados.
+    """
+    try:
+        return f"{left} {INFIX_OPERATORS[op]} {right}"
+    except KeyError:
+        return f"op({left}, {right})"
+
+
+def inline(body: str, **names) -> Compiled:
+    """
+    Cria uma closure `ctx -> valor` a partir do código fonte do seu corpo.
+
+    Os argumentos nomeados são as variáveis livres usadas no corpo.
+    """
+    return _closure_factory(body, tuple(names))(**names)
+
+
+@lru_cache
+def _closure_factory(body: str, names: tuple[str, ...]) -> Callable:
+    lines = "".join(f"        {line}\n" for line in body.splitlines())
+    src = f"def factory({', '.join(names)}):\n    def closure(ctx):\n{lines}    return closure\n"
+    ns: dict = {}
+    exec(src, ns)
+    return ns["factory"]
+
+
+def var_op_literal(var: Var, op: Callable, value: Value) -> Compiled | None:
+    """
+    Compila `var <op> literal`.
+    """
+    if var._depth not in SCOPE_ACCESS:
+        return None
+    expr = infix(op, f"{SCOPE_ACCESS[var._depth]}[name]", "value")
+    return inline(f"return {expr}", name=var.name, value=value, op=op)
+
+
+def update_var(var: Var, op: Callable, value: Value) -> Compiled | None:
+    """
+    Compila `var = var <op> literal`.
+    """
+    if var._depth not in SCOPE_ACCESS:
+        return None
+    body = f"""\
+scope = {SCOPE_ACCESS[var._depth]}
+scope[name] = result = {infix(op, "scope[name]", "value")}
+return result"""
+    return inline(body, name=var.name, value=value, op=op)
+
 
 #
 # COMANDOS
@@ -259,17 +571,32 @@ class Print(Stmt):
     
     def eval(self, ctx: Ctx):
         value = self.expr.eval(ctx)
-        # Conversão para o formato Lox
-        if value is True:
-            print("true")
-        elif value is False:
-            print("false")
-        elif value is None:
-            print("nil")
-        elif isinstance(value, float) and value.is_integer():
-            print(int(value))
-        else:
-            print(value)
+        print(show(value))
+
+    def _compile(self) -> Compiled:
+        expr = self.expr.compile()
+        return lambda ctx: print(show(expr(ctx)))
+
+
+@dataclass
+class PrintConst(Print):
+    """
+    Impressão de um literal, cuja saída é calculada uma única vez pelo
+    transformer.
+
+    Ex.: print "Hello, world!";
+    """
+    # Repetido aqui porque Node.children() só considera as anotações da
+    # própria classe
+    expr: Expr
+    text: str
+
+    def eval(self, ctx: Ctx):
+        print(self.text)
+
+    def _compile(self) -> Compiled:
+        text = self.text
+        return lambda ctx: print(text)
 
 
 @dataclass
@@ -285,6 +612,14 @@ class Return(Stmt):
         value = self.expr.eval(ctx) if self.expr else None
         raise LoxReturn(value)
 
+    def _compile(self) -> Compiled:
+        # As closures compiladas não usam exceções: o return produz um sinal
+        # (valor,) que é repassado pelos comandos até chegar em LoxFunction.
+        if self.expr is None:
+            return lambda ctx: (None,)
+        expr = self.expr.compile()
+        return lambda ctx: (expr(ctx),)
+
 
 @dataclass
 class VarDef(Stmt):
@@ -304,6 +639,15 @@ class VarDef(Stmt):
             val = None
         ctx.var_def(self.name, val)
 
+    def _compile(self) -> Compiled:
+        name = self.name
+        value = self.value.compile() if self.value is not None else None
+
+        def var_def(ctx: Ctx):
+            ctx.var_def(name, value(ctx) if value is not None else None)
+
+        return var_def
+
 
 @dataclass
 class If(Stmt):
@@ -322,6 +666,35 @@ class If(Stmt):
         elif self.else_branch is not None:
             return self.else_branch.eval(ctx)
 
+    def _compile(self) -> Compiled:
+        cond = self.cond.compile()
+        then_branch = self.then_branch.compile()
+        then_returns = may_return(self.then_branch)
+        if self.else_branch is None:
+
+            def if_(ctx: Ctx):
+                if cond(ctx):
+                    signal = then_branch(ctx)
+                    if then_returns:
+                        return signal
+
+            return if_
+
+        else_branch = self.else_branch.compile()
+        else_returns = may_return(self.else_branch)
+
+        def if_else(ctx: Ctx):
+            if cond(ctx):
+                signal = then_branch(ctx)
+                if then_returns:
+                    return signal
+            else:
+                signal = else_branch(ctx)
+                if else_returns:
+                    return signal
+
+        return if_else
+
 
 
 @dataclass
@@ -335,8 +708,58 @@ class While(Stmt):
     stmt: Stmt
 
     def eval(self, ctx: Ctx):
-        while bool(self.expr.eval(ctx)):
-            self.stmt.eval(ctx)
+        cond = self.expr.eval
+        body = self.stmt.eval
+        while cond(ctx):
+            body(ctx)
+
+    def _compile(self) -> Compiled:
+        cond = self.expr.compile()
+        if isinstance(self.stmt, Block) and self.stmt.can_reuse_scope():
+            return self._compile_reusing_scope(cond, self.stmt)
+        body = self.stmt.compile()
+
+        if may_return(self.stmt):
+
+            def while_(ctx: Ctx):
+                while cond(ctx):
+                    signal = body(ctx)
+                    if signal is not None:
+                        return signal
+
+            return while_
+
+        def while_(ctx: Ctx):
+            while cond(ctx):
+                body(ctx)
+
+        return while_
+
+    def _compile_reusing_scope(self, cond: Compiled, block: "Block") -> Compiled:
+        # O escopo do corpo é criado uma única vez por execução do laço e
+        # apenas esvaziado entre as iterações. Os comandos do corpo são
+        # chamados em sequência no código gerado, sem percorrer uma lista a
+        # cada iteração. É o caso dos laços for, que o transformer converte
+        # em um while com o incremento ao final do corpo.
+        names: dict[str, Compiled] = {}
+        lines = []
+        for i, stmt in enumerate(block.stmts):
+            name = f"stmt{i}"
+            names[name] = stmt.compile()
+            if may_return(stmt):
+                lines.append(f"signal = {name}(inner)")
+                lines.append("if signal is not None:")
+                lines.append("    return signal")
+            else:
+                lines.append(f"{name}(inner)")
+
+        if block.needs_scope():
+            setup = "scope = {}\ninner = ctx.push(scope)\n"
+            lines.append("scope.clear()")
+        else:
+            setup = "inner = ctx\n"
+        loop = "".join(f"    {line}\n" for line in lines or ["pass"])
+        return inline(f"{setup}while cond(ctx):\n{loop}", cond=cond, **names)
 
 
 
@@ -350,6 +773,11 @@ class Block(Node):
     stmts: list[Stmt]
 
     def eval(self, ctx:Ctx):
+        if not self.needs_scope():
+            for stmt in self.stmts:
+                stmt.eval(ctx)
+            return
+
         ctx = ctx.push({})
         try:
             for stmt in self.stmts:
@@ -357,6 +785,71 @@ class Block(Node):
         finally:
             ctx = ctx.pop()[1]
 
+    def _compile(self) -> Compiled:
+        needs_scope = self.needs_scope()
+
+        if not may_return(self):
+            stmts = [stmt.compile() for stmt in self.stmts]
+
+            if not needs_scope:
+
+                def block(ctx: Ctx):
+                    for stmt in stmts:
+                        stmt(ctx)
+
+                return block
+
+            def block(ctx: Ctx):
+                # O escopo empilhado é descartado ao sair da função, não é
+                # necessário desempilhá-lo explicitamente.
+                ctx = ctx.push({})
+                for stmt in stmts:
+                    stmt(ctx)
+
+            return block
+
+        # Somente comandos que contém um return podem produzir o sinal de
+        # retorno. Os demais (ex.: expressões) podem produzir outros valores,
+        # que são ignorados.
+        steps = [(stmt.compile(), may_return(stmt)) for stmt in self.stmts]
+
+        def returning_block(ctx: Ctx):
+            if needs_scope:
+                ctx = ctx.push({})
+            for stmt, returns in steps:
+                signal = stmt(ctx)
+                if returns and signal is not None:
+                    return signal
+
+        return returning_block
+
+    def needs_scope(self) -> bool:
+        """
+        Verifica se o bloco declara nomes e precisa de um escopo próprio.
+
+        Blocos sem declarações (ex.: o corpo da maioria dos laços) executam
+        diretamente no escopo em que estão. O Resolver também ignora esses
+        blocos ao calcular a profundidade das variáveis.
+
+        A verificação é feita uma única vez, pelo Resolver, e armazenada no
+        próprio nó, como em `compile()`.
+        """
+        try:
+            return self.__dict__["_needs_scope"]
+        except KeyError:
+            flag = any(isinstance(stmt, (VarDef, Function, Class)) for stmt in self.stmts)
+            self.__dict__["_needs_scope"] = flag
+            return flag
+
+    def can_reuse_scope(self) -> bool:
+        """
+        Verifica se o escopo do bloco pode ser reaproveitado entre execuções.
+
+        Funções e classes definidas no bloco podem capturar o escopo, que
+        então precisa sobreviver à execução do bloco.
+        """
+        return not any(isinstance(node, (Function, Class)) for node in self.descendants())
+
 
 @dataclass
 class Function(Stmt):
@@ -374,6 +867,18 @@ class Function(Stmt):
         ctx.var_def(self.name, fn)
         return fn
 
+    def _compile(self) -> Compiled:
+        name = self.name
+        params = self.params
+        body = self.body
+
+        def function(ctx: Ctx):
+            fn = LoxFunction(name, params, body, ctx)
+            ctx.var_def(name, fn)
+            return fn
+
+        return function
+
 
 @dataclass
 class Class(Stmt):
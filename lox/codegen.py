@@ -0,0 +1,362 @@
+"""
+Tradução de funções Lox para bytecode do CPython.
+
+O corpo de cada função é traduzido para código fonte Python equivalente e
+compilado com `compile()`. Variáveis locais e parâmetros viram variáveis
+locais do Python, de modo que a função é executada diretamente pelo
+interpretador do CPython, sem percorrer a árvore sintática nem criar escopos.
+
+Somente funções que não declaram outras funções ou classes são traduzidas:
+nestes casos o escopo da função precisa existir como um `Ctx` para ser
+capturado. As demais continuam sendo executadas pelas closures compiladas.
+"""
+
+import math
+from operator import add, eq, ge, gt, le, lt, mul, ne, neg, not_, sub, truediv
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    from .ctx import Ctx
+    from .node import Node
+
+UNARY_OPS = {
+    neg: "-",
+    not_: "not ",
+}
+FUNCTION_NAME = "_f"
+
+# Precedência dos operadores no Python. Os operandos só são colocados entre
+# parênteses quando necessário: o parser do Python limita o número de
+# parênteses aninhados. Expressões emitidas como nomes, chamadas ou entre
+# parênteses são átomos.
+COMPARISON = 5
+NOT = 4
+NEG = 9
+ATOM = 10
+PRECEDENCE = {
+    add: 7,
+    sub: 7,
+    mul: 8,
+    truediv: 8,
+    lt: COMPARISON,
+    gt: COMPARISON,
+    le: COMPARISON,
+    ge: COMPARISON,
+    eq: COMPARISON,
+    ne: COMPARISON,
+}
+
+# Erros que o Python pode lançar ao compilar código fonte muito aninhado
+CompileError = (SyntaxError, RecursionError, MemoryError)
+
+
+class Unsupported(Exception):
+    """
+    Sinaliza que a função contém construções que não podem ser traduzidas.
+    """
+
+
+def compile_function(name: str, params: list[str], body: "Node") -> Optional[Callable]:
+    """
+    Compila a função para bytecode, se possível.
+
+    A função resultante recebe o contexto em que a função Lox foi declarada
+    seguido dos argumentos. Retorna None se o corpo contém construções não
+    suportadas. O resultado é armazenado no nó do corpo da função, de modo
+    que cada declaração é traduzida uma única vez.
+    """
+    try:
+        return body.__dict__["_py"]
+    except KeyError:
+        pass
+
+    emitter = _PythonEmitter(params)
+    try:
+        src = emitter.function(body)
+        ns = emitter.namespace()
+        exec(compile(src, f"<lox {name}>", "exec"), ns)
+    except (Unsupported, *CompileError):
+        fn = None
+    else:
+        fn = ns[FUNCTION_NAME]
+
+    body.__dict__["_py"] = fn
+    return fn
+
+
+def precedence(node: "Node") -> int:
+    """
+    Precedência do código emitido para a expressão.
+    """
+    from .ast import BinOp, Literal, UnaryOp
+
+    match node:
+        case BinOp(op=op) if op in PRECEDENCE:
+            return PRECEDENCE[op]
+        case UnaryOp(op=op) if op is not_:
+            return NOT
+        case UnaryOp(op=op) if op is neg:
+            return NEG
+        case Literal(value=float() as value) if math.copysign(1, value) < 0:
+            return NEG
+    return ATOM
+
+
+def operand(src: str, node: "Node", parent: int, right: bool = False) -> str:
+    """
+    Coloca o operando entre parênteses se a precedência exigir.
+
+    Os operadores aritméticos associam à esquerda e as comparações do Python
+    são encadeadas (a < b < c), de modo que não podem ser agrupadas sem
+    parênteses.
+    """
+    prec = precedence(node)
+    if prec < parent or (prec == parent and (right or parent == COMPARISON)):
+        return f"({src})"
+    return src
+
+
+def infix(op, left: "Node", left_src: str, right: "Node", right_src: str) -> str:
+    """
+    Código fonte de uma operação binária com operador infixo.
+    """
+    from .ast import INFIX_OPERATORS
+
+    prec = PRECEDENCE[op]
+    left_src = operand(left_src, left, prec)
+    right_src = operand(right_src, right, prec, right=True)
+    return f"{left_src} {INFIX_OPERATORS[op]} {right_src}"
+
+
+def prefix(op, value: "Node", value_src: str) -> str:
+    """
+    Código fonte de uma operação unária (neg ou not_).
+    """
+    prec = NOT if op is not_ else NEG
+    return f"{UNARY_OPS[op]}{operand(value_src, value, prec)}"
+
+
+def assign(ctx: "Ctx", name: str, value):
+    """
+    Atribuição a variáveis não resolvidas estaticamente.
+    """
+    ctx[name] = value
+    return value
+
+
+def not_callable(obj):
+    raise TypeError(f"{obj} não é uma função!")
+
+
+class Emitter:
+    """
+    Base dos tradutores de funções Lox para código fonte Python.
+
+    Trata os parâmetros, os escopos dos blocos e os comandos de controle de
+    fluxo. As subclasses definem como as expressões são traduzidas e quais
+    outros comandos são aceitos.
+    """
+
+    def __init__(self, params: list[str]):
+        self.params = params
+        # Pilha de escopos da função. Cada escopo associa os nomes declarados
+        # em Lox aos nomes das variáveis locais correspondentes em Python.
+        self.scopes: list[dict[str, str]] = []
+        self.locals: set[str] = set()
+
+    def function(self, body: "Node") -> str:
+        if len(set(self.params)) != len(self.params):
+            raise Unsupported("parâmetros repetidos")
+
+        self.scopes.append({})
+        args = [self.declare(param) for param in self.params]
+        lines = self.stmt(body, 1)
+        self.scopes.pop()
+        return self.define(args, lines)
+
+    def define(self, args: list[str], lines: list[str]) -> str:
+        return "\n".join([f"def {FUNCTION_NAME}({', '.join(args)}):", *lines]) + "\n"
+
+    def declare(self, name: str) -> str:
+        scope = self.scopes[-1]
+        if name in scope:
+            # Redeclaração no mesmo escopo é um erro em tempo de execução
+            raise Unsupported(f"variável {name} redeclarada")
+
+        # Variáveis com o mesmo nome em blocos diferentes recebem nomes
+        # distintos em Python para preservar o sombreamento
+        local = f"v_{name}"
+        suffix = 0
+        while local in self.locals:
+            suffix += 1
+            local = f"v_{name}_{suffix}"
+        self.locals.add(local)
+        scope[name] = local
+        return local
+
+    def local(self, name: str) -> Optional[str]:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def stmt(self, node: "Node", indent: int) -> list[str]:
+        from .ast import Block, Expr, If, Return, While
+
+        pad = "    " * indent
+        match node:
+            case Block(stmts=stmts):
+                # Blocos sem declarações não criam escopo (ver Block.needs_scope)
+                needs_scope = node.needs_scope()
+                if needs_scope:
+                    self.scopes.append({})
+                lines = [line for stmt in stmts for line in self.stmt(stmt, indent)]
+                if needs_scope:
+                    self.scopes.pop()
+                return lines or [f"{pad}pass"]
+            case If(cond=cond, then_branch=then_branch, else_branch=else_branch):
+                lines = [f"{pad}if {self.expr(cond)}:", *self.stmt(then_branch, indent + 1)]
+                if else_branch is not None:
+                    lines.append(f"{pad}else:")
+                    lines.extend(self.stmt(else_branch, indent + 1))
+                return lines
+            case While(expr=cond, stmt=body):
+                return [f"{pad}while {self.expr(cond)}:", *self.stmt(body, indent + 1)]
+            case Return(expr=expr):
+                return [f"{pad}return {self.returned(expr)}"]
+            case Expr():
+                return [f"{pad}{self.expr(node)}"]
+        return self.other_stmt(node, indent)
+
+    def other_stmt(self, node: "Node", indent: int) -> list[str]:
+        raise Unsupported(type(node).__name__)
+
+    def returned(self, expr: "Node | None") -> str:
+        return "None" if expr is None else self.expr(expr)
+
+    def expr(self, node: "Node") -> str:
+        raise NotImplementedError
+
+
+class _PythonEmitter(Emitter):
+    def __init__(self, params: list[str]):
+        super().__init__(params)
+        self.constants: dict[str, object] = {}
+        self.temps = 0
+
+    def namespace(self) -> dict:
+        from .runtime import show
+
+        return {
+            "show": show,
+            "assign": assign,
+            "not_callable": not_callable,
+            **self.constants,
+        }
+
+    def define(self, args: list[str], lines: list[str]) -> str:
+        # A função recebe o contexto em que foi declarada
+        return super().define(["ctx", *args], lines)
+
+    def outer_scope(self, depth: int) -> str:
+        # A profundidade calculada pelo Resolver inclui os escopos da própria
+        # função, que não existem em tempo de execução.
+        hops = depth - len(self.scopes)
+        return "ctx" + ".parent" * hops + ".scope"
+
+    def constant(self, value) -> str:
+        name = f"k_{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def temp(self) -> str:
+        self.temps += 1
+        return f"t_{self.temps}"
+
+    def other_stmt(self, node: "Node", indent: int) -> list[str]:
+        from .ast import Print, PrintConst, VarDef
+
+        pad = "    " * indent
+        match node:
+            case VarDef(name=name, value=value):
+                # O valor é avaliado antes da declaração, como em VarDef.eval
+                value = "None" if value is None else self.expr(value)
+                return [f"{pad}{self.declare(name)} = {value}"]
+            case PrintConst(text=text):
+                return [f"{pad}print({text!r})"]
+            case Print(expr=expr):
+                return [f"{pad}print(show({self.expr(expr)}))"]
+        return super().other_stmt(node, indent)
+
+    def expr(self, node: "Node") -> str:
+        from .ast import (
+            And,
+            Assign,
+            BinOp,
+            Call,
+            Getattr,
+            Literal,
+            Or,
+            UnaryOp,
+            Var,
+        )
+
+        match node:
+            case Literal(value=value):
+                if value is None or isinstance(value, (bool, str)):
+                    return repr(value)
+                if isinstance(value, float) and math.isfinite(value):
+                    return repr(value)
+                return self.constant(value)
+
+            case Var(name=name):
+                if (local := self.local(name)) is not None:
+                    return local
+                if node._depth is not None:
+                    return f"{self.outer_scope(node._depth)}[{name!r}]"
+                return f"ctx.lookup({name!r})"
+
+            case Assign(name=name, value=value):
+                value = self.expr(value)
+                if (local := self.local(name)) is not None:
+                    return f"({local} := {value})"
+                if node._depth is not None:
+                    tmp = self.temp()
+                    scope = self.outer_scope(node._depth)
+                    return f"({scope}.__setitem__({name!r}, {tmp} := {value}), {tmp})[1]"
+                return f"assign(ctx, {name!r}, {value})"
+
+            case BinOp(left=left, right=right, op=op):
+                if op in PRECEDENCE:
+                    return infix(op, left, self.expr(left), right, self.expr(right))
+                return f"{self.constant(op)}({self.expr(left)}, {self.expr(right)})"
+
+            case UnaryOp(op=op, value=value):
+                if op in UNARY_OPS:
+                    return prefix(op, value, self.expr(value))
+                return f"{self.constant(op)}({self.expr(value)})"
+
+            case And(left=left, right=right):
+                tmp = self.temp()
+                left, right = self.expr(left), self.expr(right)
+                return f"({tmp} if ({tmp} := {left}) is False or {tmp} is None else {right})"
+
+            case Or(left=left, right=right):
+                tmp = self.temp()
+                left, right = self.expr(left), self.expr(right)
+                return f"({tmp} if ({tmp} := {left}) is not False and {tmp} is not None else {right})"
+
+            case Call(obj=obj, params=args):
+                # A função e os argumentos são avaliados antes de verificar se
+                # o objeto pode ser chamado, como em Call.eval
+                callee = self.temp()
+                temps = [self.temp() for _ in args]
+                steps = [f"{callee} := {self.expr(obj)}"]
+                steps.extend(f"{tmp} := {self.expr(arg)}" for tmp, arg in zip(temps, args))
+                call = f"{callee}({', '.join(temps)}) if callable({callee}) else not_callable({callee})"
+                return f"({', '.join(steps)}, {call})[-1]"
+
+            case Getattr(value=value, attr=attr):
+                return f"getattr({self.expr(value)}, {attr!r})"
+
+        raise Unsupported(type(node).__name__)
@@ -53,22 +53,24 @@ class Ctx:
         """
         Obtém o valor de uma variável pelo nome.
         """
-        if name in self.scope:
-            return self.scope[name]
-        elif self.parent is not None:
-            return self.parent[name]
+        ctx = self
+        while ctx is not None:
+            if name in ctx.scope:
+                return ctx.scope[name]
+            ctx = ctx.parent
         raise KeyError(f"Variable '{name}' not found in context.")
 
     def __setitem__(self, name: str, value: "Value") -> None:
         """
         Define o valor de uma variável pelo nome.
         """
-        if name in self.scope:
-            self.scope[name] = value
-        elif self.parent is not None:
-            self.parent[name] = value
-        else:
-            raise KeyError(f"Variable '{name}' not found in context.")
+        ctx = self
+        while ctx is not None:
+            if name in ctx.scope:
+                ctx.scope[name] = value
+                return
+            ctx = ctx.parent
+        raise KeyError(f"Variable '{name}' not found in context.")
 
     def __contains__(self, name: str) -> bool:
         """
@@ -76,6 +78,41 @@ class Ctx:
         """
         return name in self.scope or (self.parent is not None and name in self.parent)
 
+    def lookup(self, name: str) -> "Value":
+        """
+        Busca dinâmica de uma variável, do escopo mais interno para o mais
+        externo.
+
+        Usada para nomes que não foram resolvidos estaticamente (ver Resolver).
+        Lança NameError se a variável não existe.
+        """
+        ctx = self
+        while ctx is not None:
+            scope = ctx.scope
+            if name in scope:
+                return scope[name]
+            ctx = ctx.parent
+        raise NameError(f"variável {name} não existe!")
+
+    def get_at(self, depth: int, name: str) -> "Value":
+        """
+        Obtém o valor de uma variável declarada `depth` escopos acima do atual.
+        """
+        ctx = self
+        for _ in range(depth):
+            ctx = ctx.parent
+        return ctx.scope[name]
+
+    def set_at(self, depth: int, name: str, value: "Value") -> None:
+        """
+        Redefine o valor de uma variável declarada `depth` escopos acima do
+        atual.
+        """
+        ctx = self
+        for _ in range(depth):
+            ctx = ctx.parent
+        ctx.scope[name] = value
+
     def var_def(self, name: str, value: "Value") -> None:
         """
         Define uma variável no contexto atual.
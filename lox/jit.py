@@ -0,0 +1,197 @@
+"""
+Compilação opcional de funções Lox puramente numéricas com o Numba.
+
+Funções cujo corpo contém apenas aritmética, comparações, condicionais, laços,
+retornos e chamadas recursivas a si mesmas são traduzidas para código Python e
+compiladas com `numba.njit`. O Numba é uma dependência opcional: se não estiver
+instalado, nenhuma função é compilada e o interpretador é usado normalmente.
+"""
+
+import math
+import sys
+from functools import lru_cache
+from operator import eq, ge, gt, le, lt, ne, neg, not_
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, Optional
+
+from .codegen import FUNCTION_NAME, CompileError, Emitter, Unsupported, infix, prefix
+
+if TYPE_CHECKING:
+    from .node import Node
+
+DEPTH = "depth"
+
+# Número de chamadas a partir do qual vale a pena compilar a função. A
+# importação do Numba e a compilação levam algumas frações de segundo, que só
+# compensam em funções chamadas muitas vezes.
+JIT_THRESHOLD = 1000
+
+# Tipos das expressões numéricas. Os parâmetros são sempre números, já que a
+# versão compilada só é chamada com argumentos do tipo float.
+NUMBER = "number"
+BOOL = "bool"
+
+# Comparações produzem booleanos. As de ordem só são aceitas entre números.
+NUMBER_ONLY = {lt: True, le: True, gt: True, ge: True, eq: False, ne: False}
+COMPARISONS = NUMBER_ONLY.keys()
+
+# Exceções lançadas pelo Numba quando não consegue compilar a função para os
+# tipos dos argumentos recebidos. Enquanto o Numba não for carregado (ou se não
+# estiver instalado), a tupla vazia faz com que o `except` correspondente nunca
+# seja ativado.
+JitError: Any = ()
+
+
+class NumericFunction(NamedTuple):
+    """
+    Função compilada pelo Numba.
+
+    Chamadas recursivas são compiladas como chamadas diretas à própria função.
+    Se `calls_itself` for verdadeiro, a versão compilada só pode ser usada
+    enquanto o nome da função continuar associado a ela no escopo em que foi
+    declarada.
+    """
+
+    fn: Callable
+    calls_itself: bool
+
+
+@lru_cache
+def load_numba():
+    """
+    Importa o Numba na primeira vez em que uma função é compilada.
+
+    Retorna None se o Numba não estiver instalado.
+    """
+    global JitError
+    try:
+        import numba
+        from numba.core.errors import NumbaError
+    except ImportError:
+        return None
+    JitError = NumbaError
+    return numba
+
+
+def compiled_numeric(body: "Node") -> Optional[NumericFunction]:
+    """
+    Retorna a versão já compilada de uma função, sem compilá-la.
+    """
+    return body.__dict__.get("_jit")
+
+
+def compile_numeric(name: str, params: list[str], body: "Node") -> Optional[NumericFunction]:
+    """
+    Compila a função com o Numba, se possível.
+
+    Retorna None se o Numba não estiver instalado ou se o corpo da função não
+    for puramente numérico. O resultado é armazenado no nó do corpo da função,
+    de modo que cada declaração é analisada e compilada uma única vez.
+    """
+    numba = load_numba()
+    if numba is None:
+        return None
+    try:
+        return body.__dict__["_jit"]
+    except KeyError:
+        pass
+
+    emitter = _NumericEmitter(name, params)
+    ns: dict = {}
+    try:
+        src = emitter.function(body)
+        exec(compile(src, f"<lox {name}>", "exec"), ns)
+    except (Unsupported, *CompileError):
+        numeric = None
+    else:
+        fn = ns[FUNCTION_NAME] = numba.njit(ns[FUNCTION_NAME])
+        numeric = NumericFunction(fn, emitter.calls_itself)
+
+    body.__dict__["_jit"] = numeric
+    return numeric
+
+
+class _NumericEmitter(Emitter):
+    def __init__(self, name: str, params: list[str]):
+        super().__init__(params)
+        self.name = name
+        self.returns: set[str] = set()
+        self.calls_itself = False
+
+    def define(self, args: list[str], lines: list[str]) -> str:
+        if self.calls_itself:
+            if self.returns == {BOOL}:
+                # Chamadas recursivas são tratadas como números
+                raise Unsupported("função recursiva com retorno booleano")
+
+            # O código compilado pelo Numba não tem o limite de recursão do
+            # Python e esgotaria a pilha do processo. A profundidade é passada
+            # explicitamente entre as chamadas recursivas.
+            args = [*args, f"{DEPTH}=0"]
+            limit = sys.getrecursionlimit()
+            lines = [
+                f"    if {DEPTH} > {limit}:",
+                '        raise RecursionError("maximum recursion depth exceeded")',
+                *lines,
+            ]
+        return super().define(args, lines)
+
+    def returned(self, expr: "Node | None") -> str:
+        if expr is None:
+            raise Unsupported("retorno sem valor")
+        src, kind = self.typed(expr)
+        self.returns.add(kind)
+        if len(self.returns) > 1:
+            raise Unsupported("retorno com números e booleanos")
+        return src
+
+    def expr(self, node: "Node") -> str:
+        return self.typed(node)[0]
+
+    def typed(self, node: "Node") -> tuple[str, str]:
+        """
+        Código fonte da expressão e o seu tipo (NUMBER ou BOOL).
+        """
+        from .ast import INFIX_OPERATORS, Assign, BinOp, Call, Literal, UnaryOp, Var
+
+        match node:
+            case Literal(value=bool() as value):
+                return repr(value), BOOL
+            case Literal(value=float() as value) if math.isfinite(value):
+                return repr(value), NUMBER
+            case Var(name=name) if (local := self.local(name)) is not None:
+                return local, NUMBER
+            case Assign(name=name, value=value) if (local := self.local(name)) is not None:
+                # Os parâmetros precisam continuar sendo números
+                return f"({local} := {self.number(value)})", NUMBER
+            case BinOp(left=left, right=right, op=op) if op in COMPARISONS:
+                (left_src, left_kind), (right_src, right_kind) = self.typed(left), self.typed(right)
+                if NUMBER_ONLY[op] and BOOL in (left_kind, right_kind):
+                    raise Unsupported("comparação de booleanos")
+                return infix(op, left, left_src, right, right_src), BOOL
+            case BinOp(left=left, right=right, op=op) if op in INFIX_OPERATORS:
+                left_src, right_src = self.number(left), self.number(right)
+                return infix(op, left, left_src, right, right_src), NUMBER
+            case UnaryOp(op=op, value=value) if op is not_:
+                return prefix(op, value, self.expr(value)), BOOL
+            case UnaryOp(op=op, value=value) if op is neg:
+                return prefix(op, value, self.number(value)), NUMBER
+            case Call(obj=Var() as callee, params=args) if self.is_recursive_call(callee, args):
+                self.calls_itself = True
+                args = ", ".join([*(self.number(arg) for arg in args), f"{DEPTH} + 1"])
+                return f"{FUNCTION_NAME}({args})", NUMBER
+        raise Unsupported(type(node).__name__)
+
+    def number(self, node: "Node") -> str:
+        src, kind = self.typed(node)
+        if kind != NUMBER:
+            raise Unsupported("booleano usado como número")
+        return src
+
+    def is_recursive_call(self, callee: "Node", args: list) -> bool:
+        # A função está declarada no escopo imediatamente acima dos escopos
+        # da própria função (ver Resolver)
+        return (
+            callee.name == self.name
+            and callee._depth == len(self.scopes)
+            and len(args) == len(self.params)
+        )
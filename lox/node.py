@@ -42,6 +42,29 @@ class Node(ABC):
         name = type(self).__name__
         raise NotImplementedError(f"Método eval não implementado para {name}!")
 
+    def compile(self) -> Callable[[Any], Any]:
+        """
+        Compila o nó para uma função que recebe o contexto de execução e
+        produz o mesmo resultado que `eval`.
+
+        A função é criada uma única vez e armazenada no próprio nó, de modo
+        que avaliações repetidas (ex.: ao reentrar no corpo de uma função)
+        reutilizam a mesma closure.
+        """
+        try:
+            return self.__dict__["_compiled"]
+        except KeyError:
+            fn = self.__dict__["_compiled"] = self._compile()
+            return fn
+
+    def _compile(self) -> Callable[[Any], Any]:
+        """
+        Implementação de `compile`. Subclasses devem sobrescrever este método.
+
+        A implementação padrão simplesmente delega para o método `eval`.
+        """
+        return self.eval
+
     def pretty(self, indent: int = 2) -> str:
         """
         Método para imprimir a árvore sintática de forma legível.
@@ -11,6 +11,7 @@ from typing import Iterator
 from lark import Lark, Token, Tree
 
 from .ast import Expr, Program
+from .resolver import resolve
 from .transformer import LoxTransformer
 
 DIR = Path(__file__).parent
@@ -46,6 +47,7 @@ def parse(src: str) -> Program:
     assert isinstance(tree, Program), f"Esperava um Program, mas recebi {type(tree)}"
     tree.validate_tree()
     tree.desugar_tree()
+    resolve(tree)
     return tree
 
 
@@ -74,6 +76,7 @@ def parse_expr(src: str) -> Expr:
     assert isinstance(tree, Expr), f"Esperava um Expr, mas recebi {type(tree)}"
     tree.validate_tree()
     tree.desugar_tree()
+    resolve(tree)
     return tree
 
 
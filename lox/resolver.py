@@ -0,0 +1,97 @@
+"""
+Resolução estática de nomes.
+
+Percorre a árvore sintática acompanhando os escopos criados por blocos e
+funções e anota cada `Var` e `Assign` com a distância (em número de escopos)
+entre o uso da variável e o escopo em que ela foi declarada. Durante a
+execução, a variável pode então ser acessada diretamente no escopo correto,
+sem testar cada escopo intermediário.
+
+Nomes que não são declarados no programa antes do uso (variáveis passadas no
+ambiente, funções nativas, globais declaradas mais adiante, etc.) não são
+anotados e continuam sendo buscados dinamicamente.
+"""
+
+from .ast import Assign, Block, Class, Function, Program, Var, VarDef
+from .node import Node
+
+
+class Resolver:
+    """
+    Calcula a profundidade de cada variável local na árvore sintática.
+    """
+
+    def __init__(self):
+        # Pilha de escopos, do mais externo para o mais interno. Cada escopo é
+        # o conjunto de nomes declarados até o momento.
+        self.scopes: list[set[str]] = []
+
+    def resolve(self, node: Node) -> None:
+        """
+        Resolve os nomes do nó e de todos os seus descendentes.
+        """
+        match node:
+            case Program(stmts=stmts):
+                # O programa é executado no escopo global
+                self._resolve_scope(stmts)
+
+            case Block(stmts=stmts):
+                if node.needs_scope():
+                    self._resolve_scope(stmts)
+                else:
+                    for stmt in stmts:
+                        self.resolve(stmt)
+
+            case VarDef(name=name, value=value):
+                if value is not None:
+                    self.resolve(value)
+                self._declare(name)
+
+            case Function(name=name, params=params, body=body):
+                # Declaramos antes do corpo para permitir recursão
+                self._declare(name)
+                self.scopes.append(set(params))
+                self.resolve(body)
+                self.scopes.pop()
+
+            case Class(name=name):
+                self._declare(name)
+                self._resolve_children(node)
+
+            case Var(name=name):
+                node._depth = self._depth(name)
+
+            case Assign(name=name, value=value):
+                self.resolve(value)
+                node._depth = self._depth(name)
+
+            case _:
+                self._resolve_children(node)
+
+    def _resolve_scope(self, stmts: list) -> None:
+        self.scopes.append(set())
+        for stmt in stmts:
+            self.resolve(stmt)
+        self.scopes.pop()
+
+    def _resolve_children(self, node: Node) -> None:
+        for child in node.children():
+            self.resolve(child)
+
+    def _declare(self, name: str) -> None:
+        if self.scopes:
+            self.scopes[-1].add(name)
+
+    def _depth(self, name: str) -> int | None:
+        for depth, scope in enumerate(reversed(self.scopes)):
+            if name in scope:
+                return depth
+        return None
+
+
+def resolve(node: Node) -> None:
+    """
+    Anota as variáveis da árvore com a profundidade do escopo onde foram
+    declaradas.
+    """
+    Resolver().resolve(node)
@@ -1,13 +1,15 @@
 import builtins
 from dataclasses import dataclass
 from operator import add, eq, ge, gt, le, lt, mul, ne, neg, not_, sub, truediv
-from typing import TYPE_CHECKING
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable
 
-from .ctx import Ctx
+from . import codegen, jit
+from .ctx import Ctx, ScopeDict
 
 class LoxReturn(Exception):
-    def init(self, value):
-        super().init()
+    def __init__(self, value):
+        super().__init__(value)
         self.value = value
 
 @dataclass
@@ -17,25 +19,97 @@ class LoxFunction:
     body: object  # Block
     ctx: Ctx
 
+    def __post_init__(self):
+        # Versão compilada pelo Numba, quando disponível (ver lox.jit). A
+        # função só é compilada depois de jit.JIT_THRESHOLD chamadas, a não ser
+        # que outra instância da mesma declaração já tenha sido compilada.
+        self._calls = 0
+        self._set_jit(jit.compiled_numeric(self.body))
+        # Versão traduzida para bytecode do CPython (ver lox.codegen)
+        self._py = codegen.compile_function(self.name, self.params, self.body)
+        self._nparams = len(self.params)
+        self._bind = make_binder(tuple(self.params))
+
     def call(self, args):
         # Checa aridade
-        if len(args) != len(self.params):
-            raise RuntimeError(f"Expected {len(self.params)} arguments but got {len(args)}.")
-        local_ctx = self.ctx.push({})
+        if len(args) != self._nparams:
+            raise RuntimeError(f"Expected {self._nparams} arguments but got {len(args)}.")
+        if self._jit is not None:
+            if self._jit_applies(args):
+                try:
+                    return self._jit(*args)
+                except jit.JitError:
+                    # Argumentos de tipos que o Numba não suporta
+                    self._jit = None
+        elif self._calls < jit.JIT_THRESHOLD:
+            self._calls += 1
+            if self._calls == jit.JIT_THRESHOLD:
+                self._set_jit(jit.compile_numeric(self.name, self.params, self.body))
+        if self._py is not None:
+            return self._py(self.ctx, *args)
+        local_ctx = self.ctx.push(self._bind(args))
+        # O corpo é compilado na primeira chamada e reutilizado nas seguintes
+        body = self.body.compile()
         try:
-            for param, arg in zip(self.params, args):
-                local_ctx.var_def(param, arg)
-            try:
-                self.body.eval(local_ctx)
-            except LoxReturn as ex:
-                return ex.value
-        finally:
-            local_ctx = local_ctx.pop()[1]
-
-    def call(self, *args):
+            signal = body(local_ctx)
+        except LoxReturn as ex:
+            # Return avaliado fora das closures compiladas (ver Node.eval)
+            return ex.value
+        # O corpo compilado produz (valor,) quando encontra um return
+        if signal is not None:
+            return signal[0]
+
+    def _set_jit(self, numeric: "jit.NumericFunction | None") -> None:
+        self._jit = numeric.fn if numeric is not None else None
+        self._jit_calls_itself = numeric is not None and numeric.calls_itself
+
+    def _jit_applies(self, args) -> bool:
+        # A versão do Numba chama a si mesma diretamente nas chamadas
+        # recursivas, o que só é correto se o nome da função não foi
+        # redefinido. O corpo não altera variáveis externas, de modo que basta
+        # verificar no início da chamada.
+        if self._jit_calls_itself and self.ctx.scope.get(self.name) is not self:
+            return False
+        # Os parâmetros são tratados como números
+        return all(type(arg) is float for arg in args)
+
+    def __call__(self, *args):
         return self.call(args)
 
 
+@lru_cache
+def make_binder(params: tuple[str, ...]) -> Callable[[tuple], ScopeDict]:
+    """
+    Cria a função que monta o escopo de uma chamada a partir dos argumentos.
+
+    Funções com até 4 parâmetros usam versões especializadas pela aridade.
+    """
+    if len(set(params)) != len(params):
+
+        def bind(args):
+            scope = {}
+            for param, arg in zip(params, args):
+                if param in scope:
+                    raise KeyError(f"Variable '{param}' already defined in the current scope.")
+                scope[param] = arg
+            return scope
+
+        return bind
+
+    match params:
+        case ():
+            return lambda args: {}
+        case (p0,):
+            return lambda args: {p0: args[0]}
+        case (p0, p1):
+            return lambda args: {p0: args[0], p1: args[1]}
+        case (p0, p1, p2):
+            return lambda args: {p0: args[0], p1: args[1], p2: args[2]}
+        case (p0, p1, p2, p3):
+            return lambda args: {p0: args[0], p1: args[1], p2: args[2], p3: args[3]}
+    return lambda args: dict(zip(params, args))
+
+
 nan = float("nan")
 inf = float("inf")
 
@@ -51,9 +125,28 @@ def show(value: "Value") -> str:
     """
     Converte valor lox para string.
     """
+    return SHOW_BY_TYPE.get(type(value), str)(value)
+
+
+def show_number(value: float) -> str:
+    """
+    Mostra números inteiros sem a parte decimal, como em Lox.
+    """
+    if value.is_integer():
+        return str(int(value))
     return str(value)
 
 
+# Conversão para string de acordo com o tipo do valor. Tipos ausentes usam a
+# conversão padrão do Python.
+SHOW_BY_TYPE = {
+    bool: lambda value: "true" if value else "false",
+    type(None): lambda value: "nil",
+    float: show_number,
+    str: str,
+}
+
+
 def show_repr(value: "Value") -> str:
     """
     Mostra um valor lox, mas coloca aspas em strings.
@@ -14,7 +14,7 @@ from dataclasses import dataclass  # <-- Adicione esta linha
 from . import runtime as op
 from .ast import (
     Program, BinOp, Var, Literal, And, Or, UnaryOp, Call, This, Super,
-    Assign, Getattr, Setattr, Print, Return, VarDef, If, While, Block, Function, Class
+    Assign, Getattr, Setattr, Print, PrintConst, Return, VarDef, If, While, Block, Function, Class
 )
 
 
@@ -26,11 +26,31 @@ def op_handler(op: Callable):
     """
 
     def method(self, left, right):
-        return BinOp(left, right, op)
+        return fold(op, left, right) or BinOp(left, right, op)
 
     return method
 
 
+def fold(op: Callable, *args) -> Literal | None:
+    """
+    Avalia a operação durante a construção da árvore quando todos os
+    argumentos são literais.
+
+    Retorna o Literal com o resultado ou None se a operação não puder ser
+    calculada antecipadamente. Operações que falham (ex.: 1 / 0) são mantidas
+    para que o erro ocorra em tempo de execução.
+    """
+    if not all(isinstance(arg, Literal) for arg in args):
+        return None
+    try:
+        return Literal(op(*(arg.value for arg in args)))
+    except Exception:
+        return None
+
+
+# O LoxTransformer é executado pelo próprio parser LALR (ver lox.parser). O Lark
+# obtém o método de cada regra e de cada terminal uma única vez, ao construir o
+# parser, e não faz buscas com getattr a cada nó.
 @v_args(inline=True)
 class LoxTransformer(Transformer):
     def start(self, program):
@@ -77,9 +97,14 @@ class LoxTransformer(Transformer):
         return UnaryOp(op.neg, value)
     
     def and_(self, left, right):
+        # Curto-circuito com literal à esquerda: o resultado já é conhecido
+        if isinstance(left, Literal):
+            return right if op.truthy(left.value) else left
         return And(left, right)
     
     def or_(self, left, right):
+        if isinstance(left, Literal):
+            return left if op.truthy(left.value) else right
         return Or(left, right)
     
     def assign(self, var, value):
@@ -136,6 +161,9 @@ class LoxTransformer(Transformer):
 
     # Comandos
     def print_cmd(self, expr):
+        # A saída de um literal é sempre a mesma e pode ser formatada agora
+        if isinstance(expr, Literal):
+            return PrintConst(expr, op.show(expr.value))
         return Print(expr)
 
     def VAR(self, token):
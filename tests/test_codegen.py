@@ -0,0 +1,196 @@
+"""
+Os mesmos programas executados pelas closures compiladas, pela tradução para
+bytecode (lox.codegen) e pelo JIT do Numba (lox.jit) devem produzir a mesma
+saída.
+"""
+
+import pytest
+
+import lox
+from lox import codegen, jit
+from lox.ctx import Ctx
+
+
+@pytest.fixture(params=["closures", "codegen", "jit"])
+def engine(request, monkeypatch):
+    if request.param == "jit":
+        pytest.importorskip("numba")
+        monkeypatch.setattr(jit, "JIT_THRESHOLD", 1)
+    else:
+        monkeypatch.setattr(jit, "compile_numeric", lambda name, params, body: None)
+    if request.param == "closures":
+        monkeypatch.setattr(codegen, "compile_function", lambda name, params, body: None)
+    return request.param
+
+
+def run(src: str, capsys) -> tuple[str, Ctx]:
+    ctx = Ctx.from_dict({})
+    lox.eval(src, ctx)
+    return capsys.readouterr().out, ctx
+
+
+def test_sombreamento_em_blocos(engine, capsys):
+    src = """
+    fun f(x) {
+        var a = "outer";
+        {
+            var a = "inner";
+            print a;
+            { var a = x; print a; }
+            print a;
+        }
+        print a;
+    }
+    f(1);
+    """
+    out, _ = run(src, capsys)
+    assert out == "inner\n1\ninner\nouter\n"
+
+
+def test_atribuição_a_variáveis_externas_e_globais(engine, capsys):
+    src = """
+    var g = 1;
+    fun outer() {
+        var n = 10;
+        fun inc() { n = n + 1; g = g + n; return n; }
+        return inc;
+    }
+    var i = outer();
+    print i();
+    print i();
+    print g;
+
+    var total = 0;
+    fun add(x) { total = total + x; }
+    add(2);
+    add(3);
+    print total;
+    """
+    out, _ = run(src, capsys)
+    assert out == "11\n12\n24\n5\n"
+
+
+def test_var_local_em_laços(engine, capsys):
+    src = """
+    fun squares(n) {
+        var s = 0;
+        var i = 0;
+        while (i < n) { var sq = i * i; s = s + sq; i = i + 1; }
+        return s;
+    }
+    fun repeat(n) {
+        var out = "";
+        for (var i = 0; i < n; i = i + 1) { var c = "x"; out = out + c; }
+        return out;
+    }
+    print squares(4);
+    print repeat(3);
+    """
+    out, _ = run(src, capsys)
+    assert out == "14\nxxx\n"
+
+
+def test_referência_a_globais_declaradas_depois(engine, capsys):
+    src = """
+    fun a() { return b() + 1; }
+    fun b() { return later; }
+    var later = 41;
+    print a();
+    """
+    out, _ = run(src, capsys)
+    assert out == "42\n"
+
+
+def test_nomes_indefinidos(engine, capsys):
+    with pytest.raises(NameError):
+        run("fun f() { return missing; } f();", capsys)
+    with pytest.raises(KeyError):
+        run("fun f() { missing = 1; } f();", capsys)
+
+
+def test_funções_com_funções_aninhadas_usam_as_closures(engine, capsys):
+    src = """
+    fun make() {
+        var count = 0;
+        fun inc() { count = count + 1; return count; }
+        return inc;
+    }
+    var c = make();
+    c();
+    print c();
+    """
+    out, ctx = run(src, capsys)
+    assert out == "2\n"
+    assert ctx["make"]._py is None
+    if engine == "codegen":
+        assert ctx["c"]._py is not None
+
+
+def test_retorno_com_números_e_booleanos(engine, capsys):
+    src = """
+    fun f(n) { if (n > 0) return 1; return false; }
+    fun g(n) { if (n > 0) return n; return n < 0; }
+    print f(0);
+    print f(1);
+    print g(-1);
+    """
+    out, _ = run(src, capsys)
+    assert out == "false\n1\ntrue\n"
+
+
+def test_recursão_respeita_redefinição_do_nome(engine, capsys):
+    src = """
+    fun f(n) { if (n < 1) return 0; return f(n - 1) + 1; }
+    var g = f;
+    print g(3);
+    fun f(n) { return 100; }
+    print g(3);
+    """
+    out, _ = run(src, capsys)
+    assert out == "3\n101\n"
+
+
+def test_fibonacci(engine, capsys):
+    src = """
+    fun fib(n) { if (n < 2) return n; return fib(n - 2) + fib(n - 1); }
+    print fib(15);
+    """
+    out, ctx = run(src, capsys)
+    assert out == "610\n"
+    if engine == "jit":
+        assert ctx["fib"]._jit is not None
+
+
+def test_funções_muito_aninhadas(engine, capsys):
+    # O Python limita o aninhamento de parênteses e de blocos. Funções que
+    # ultrapassam esses limites continuam sendo executadas pelas closures.
+    terms = " + ".join(["a"] * 210)
+    nested = "a + (" * 210 + "a" + ")" * 210
+    loops = "while (i < 1) { " * 22 + "i = i + 1;" + " }" * 22
+    src = f"""
+    fun flat(a) {{ return {terms}; }}
+    fun nested(a) {{ return {nested}; }}
+    fun loops() {{ var i = 0; {loops} return i; }}
+    print flat(1);
+    print nested(1);
+    print loops();
+    """
+    out, ctx = run(src, capsys)
+    assert out == "210\n211\n1\n"
+    assert ctx["nested"]._py is None
+    assert ctx["loops"]._py is None
+    if engine == "codegen":
+        assert ctx["flat"]._py is not None
+
+
+def test_recursão_infinita_lança_recursion_error(engine, capsys):
+    src = """
+    fun down(n) { if (n == 0) return 0; return down(n - 1); }
+    var i = 0;
+    while (i < 1100) { down(1); i = i + 1; }
+    print down(100);
+    print down(1000000);
+    """
+    with pytest.raises(RecursionError):
+        run(src, capsys)
+    assert capsys.readouterr().out.startswith("0\n")
@@ -0,0 +1,50 @@
+"""
+Expressões com operandos literais são calculadas pelo LoxTransformer.
+"""
+
+import pytest
+
+import lox
+from lox.ast import And, BinOp, Literal, UnaryOp, Var
+
+
+def test_aritmética_com_literais():
+    assert lox.parse_expr("1 + 2 * 3") == Literal(7.0)
+    assert lox.parse_expr("(1 + 2) * 3 - 4 / 2") == Literal(7.0)
+    assert lox.parse_expr('"a" + "b"') == Literal("ab")
+    assert lox.parse_expr("1 < 2") == Literal(True)
+
+
+def test_expressões_com_variáveis_não_são_calculadas():
+    ast = lox.parse_expr("x + 1 * 2")
+    assert isinstance(ast, BinOp)
+    assert ast.left == Var("x")
+    assert ast.right == Literal(2.0)
+
+
+def test_divisão_por_zero_não_é_calculada():
+    ast = lox.parse_expr("1 / 0")
+    assert isinstance(ast, BinOp)
+    with pytest.raises(ZeroDivisionError):
+        lox.eval("print 1 / 0;")
+
+
+def test_operações_com_tipos_inválidos_não_são_calculadas():
+    ast = lox.parse_expr('"a" + 1')
+    assert isinstance(ast, BinOp)
+    with pytest.raises(TypeError):
+        lox.eval('print "a" + 1;')
+
+
+def test_operadores_lógicos_com_literal_à_esquerda():
+    assert lox.parse_expr("true and x") == Var("x")
+    assert lox.parse_expr("nil and x") == Literal(None)
+    assert lox.parse_expr("0 or x") == Literal(0.0)
+    assert lox.parse_expr("false or x") == Var("x")
+    assert isinstance(lox.parse_expr("x and true"), And)
+
+
+def test_operadores_unários_são_mantidos(capsys):
+    assert isinstance(lox.parse_expr("-42"), UnaryOp)
+    lox.eval("print -42;")
+    assert capsys.readouterr().out == "-42\n"
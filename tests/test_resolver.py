@@ -0,0 +1,67 @@
+"""
+Profundidades calculadas pelo Resolver (ver lox.resolver).
+"""
+
+import lox
+from lox.ast import Assign, Var
+
+
+def depths(src: str, cls=Var) -> list[tuple[str, int | None]]:
+    ast = lox.parse(src)
+    return [(node.name, node._depth) for node in ast.descendants() if isinstance(node, cls)]
+
+
+def test_variáveis_globais():
+    assert depths("var a = 1; print a;") == [("a", 0)]
+
+
+def test_variáveis_em_blocos():
+    src = "var a = 1; { var b = 2; print a + b; }"
+    assert depths(src) == [("a", 1), ("b", 0)]
+
+
+def test_blocos_sem_declarações_não_contam_como_escopo():
+    src = "var a = 1; { { print a; } }"
+    assert depths(src) == [("a", 0)]
+
+
+def test_sombreamento():
+    src = "var a = 1; { var a = 2; print a; } print a;"
+    assert depths(src) == [("a", 0), ("a", 0)]
+    src = "var a = 1; { print a; var a = 2; print a; }"
+    assert depths(src) == [("a", 1), ("a", 0)]
+
+
+def test_parâmetros_e_globais_em_funções():
+    src = "var g = 1; fun f(x) { var y = x; return y + g; }"
+    assert depths(src) == [("x", 1), ("y", 0), ("g", 2)]
+
+
+def test_recursão():
+    src = "fun f(n) { return f(n - 1); }"
+    assert depths(src) == [("f", 1), ("n", 0)]
+
+
+def test_nomes_não_declarados_são_dinâmicos():
+    src = "fun f() { return later + clock(); } var later = 1;"
+    assert depths(src) == [("later", None), ("clock", None)]
+
+
+def test_atribuição():
+    src = "var a = 1; fun f() { var b = 2; { var c; a = b; c = a; } }"
+    assert depths(src, Assign) == [("a", 3), ("c", 0)]
+
+
+def test_execução_com_sombreamento(capsys):
+    src = """
+    var a = "global";
+    {
+        fun show() { print a; }
+        show();
+        var a = "block";
+        show();
+        print a;
+    }
+    """
+    lox.eval(src)
+    assert capsys.readouterr().out == "global\nglobal\nblock\n"
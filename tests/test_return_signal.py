@@ -0,0 +1,80 @@
+"""
+Retornos atravessando if, while e blocos nas closures compiladas.
+
+As funções declaram uma função aninhada para não serem traduzidas por
+lox.codegen e usarem as closures.
+"""
+
+import pytest
+
+import lox
+from lox.runtime import LoxReturn
+
+
+def run(src: str, capsys) -> str:
+    lox.eval(src)
+    return capsys.readouterr().out
+
+
+def test_retorno_dentro_de_if_e_blocos(capsys):
+    src = """
+    fun f(x) {
+        fun nested() {}
+        if (x > 0) {
+            { return "positivo"; }
+        } else if (x < 0) return "negativo";
+        print "zero";
+    }
+    print f(1);
+    print f(-1);
+    print f(0);
+    """
+    assert run(src, capsys) == "positivo\nnegativo\nzero\nnil\n"
+
+
+def test_retorno_dentro_de_laços(capsys):
+    src = """
+    fun first_square_above(n) {
+        fun nested() {}
+        var i = 0;
+        while (true) {
+            var sq = i * i;
+            if (sq > n) return sq;
+            i = i + 1;
+        }
+    }
+    fun count_to(n) {
+        fun nested() {}
+        for (var i = 0; ; i = i + 1) {
+            if (i == n) { return i; }
+        }
+    }
+    print first_square_above(10);
+    print count_to(3);
+    """
+    assert run(src, capsys) == "16\n3\n"
+
+
+def test_expressões_não_são_confundidas_com_retornos(capsys):
+    src = """
+    fun f() {
+        fun nested() {}
+        var x = 1;
+        x = 2;
+        nested();
+        { x = 3; }
+        while (x < 5) x = x + 1;
+    }
+    print f();
+    """
+    assert run(src, capsys) == "nil\n"
+
+
+def test_retorno_no_programa_interrompe_a_execução(capsys):
+    with pytest.raises(LoxReturn):
+        lox.eval("print 1; return; print 2;")
+    assert capsys.readouterr().out.startswith("1\nPrograma terminou com um erro")
+
+    with pytest.raises(LoxReturn):
+        lox.eval('var i = 0; while (true) { i = i + 1; if (i > 2) return i; } print "depois";')
+    assert "depois" not in capsys.readouterr().out